@@ -2,31 +2,44 @@ from typing import Dict, Optional
 from .amazon_agent import AmazonAgent
 from .flipkart_agent import FlipkartAgent
 from .aliexpress_agent import AliExpressAgent
+import asyncio
 import logging
 
 class AgentFactory:
     _instances: Dict[str, object] = {}
+    _locks: Dict[str, asyncio.Lock] = {}
+    _agent_classes = {
+        "amazon": AmazonAgent,
+        "flipkart": FlipkartAgent,
+        "aliexpress": AliExpressAgent,
+    }
     
     @classmethod
     async def get_agent(cls, platform: str):
         """Get or create an agent for the specified platform"""
         platform = platform.lower()
+        if platform in cls._instances:
+            return cls._instances[platform]
         
-        if platform not in cls._instances:
-            if platform == "amazon":
-                agent = AmazonAgent()
-            elif platform == "flipkart":
-                agent = FlipkartAgent()
-            elif platform == "aliexpress":
-                agent = AliExpressAgent()
-            else:
-                raise ValueError(f"Unsupported platform: {platform}")
-            
-            await agent.initialize()
-            cls._instances[platform] = agent
+        if platform not in cls._agent_classes:
+            raise ValueError(f"Unsupported platform: {platform}")
+        
+        # Concurrent first calls must not launch two browsers for one platform,
+        # while different platforms still launch in parallel
+        lock = cls._locks.setdefault(platform, asyncio.Lock())
+        async with lock:
+            if platform not in cls._instances:
+                agent = cls._agent_classes[platform]()
+                await agent.initialize()
+                cls._instances[platform] = agent
             
         return cls._instances[platform]
     
+    @classmethod
+    def get_metrics(cls) -> Dict[str, Dict]:
+        """Navigation metrics for each active agent"""
+        return {platform: agent.get_metrics() for platform, agent in cls._instances.items()}
+
     @classmethod
     async def close_all(cls):
         """Close all active agents"""
@@ -12,7 +12,7 @@ class AliExpressAgent(EcommerceAgent):
     async def login(self, credentials: Dict[str, str]):
         """Login to AliExpress"""
         try:
-            await self.page.goto(f"{self.base_url}/login.html")
+            await self._goto(f"{self.base_url}/login.html")
             
             # Enter email/username
             await self._safe_type("#fm-login-id", credentials["username"])
@@ -32,27 +32,40 @@ class AliExpressAgent(EcommerceAgent):
             logging.error(f"Failed to login to AliExpress: {str(e)}")
             return False
 
+    def _search_url(self, query: str, filters: Optional[Dict] = None) -> str:
+        """Construct search URL with filters"""
+        search_url = f"{self.base_url}/wholesale?SearchText={query}"
+        if filters:
+            if filters.get("min_price"):
+                search_url += f"&minPrice={filters['min_price']}"
+            if filters.get("max_price"):
+                search_url += f"&maxPrice={filters['max_price']}"
+        return search_url
+
     async def search(self, query: str, filters: Optional[Dict] = None) -> List[Dict]:
         """Search for products on AliExpress"""
         try:
-            # Construct search URL
-            search_url = f"{self.base_url}/wholesale?SearchText={query}"
-            if filters:
-                if filters.get("min_price"):
-                    search_url += f"&minPrice={filters['min_price']}"
-                if filters.get("max_price"):
-                    search_url += f"&maxPrice={filters['max_price']}"
-            
-            await self.page.goto(search_url)
-            
-            # Wait for search results
-            await self.page.wait_for_selector(".list--gallery--34TropR")
+            # Large batches: one round trip per poll instead of per ten cards
+            products = []
+            async for batch in self.search_stream(query, filters, batch_size=500):
+                products.extend(batch)
+            return products
             
-            # Extract product information
-            products = await self.page.evaluate("""
-                () => {
+        except Exception as e:
+            logging.error(f"Failed to search AliExpress: {str(e)}")
+            return []
+
+    async def search_stream(self, query: str, filters: Optional[Dict] = None, batch_size: int = 10):
+        """Search for products on AliExpress, yielding results as they are extracted"""
+        # Extract product information one batch of item links at a time
+        async for batch in self._stream_search_results(
+            self._search_url(query, filters),
+            ".list--gallery--34TropR",
+            """
+                ([start, count]) => {
                     const results = [];
-                    document.querySelectorAll('a[href*="/item/"]').forEach(item => {
+                    const items = document.querySelectorAll('a[href*="/item/"]');
+                    Array.from(items).slice(start, start + count).forEach(item => {
                         const card = item.closest('.list--gallery--34TropR');
                         if (card) {
                             const title = card.querySelector('.multi--titleText--nXeOvyr')?.textContent;
@@ -72,56 +85,76 @@ class AliExpressAgent(EcommerceAgent):
                             }
                         }
                     });
-                    return results;
+                    return {items: results, next: Math.min(start + count, items.length), total: items.length};
                 }
-            """)
-            
-            return products
-            
-        except Exception as e:
-            logging.error(f"Failed to search AliExpress: {str(e)}")
-            return []
+            """,
+            batch_size
+        ):
+            yield batch
 
-    async def get_product_details(self, product_id: str) -> Dict:
+    async def get_product_details(self, product_id: str, page=None) -> Dict:
         """Get detailed information about a specific AliExpress product"""
         try:
-            await self.page.goto(f"{self.base_url}/item/{product_id}.html")
-            
-            # Wait for product details to load
-            await self.page.wait_for_selector(".product-title")
+            details = {}
+            async for part in self.get_product_details_stream(product_id, page):
+                details.update(part)
+            return details
             
-            # Extract product details
-            details = await self.page.evaluate("""
+        except Exception as e:
+            logging.error(f"Failed to get AliExpress product details: {str(e)}")
+            return {}
+
+    async def get_product_details_stream(self, product_id: str, page=None):
+        """Get AliExpress product details, yielding the summary fields before the rest"""
+        async for part in self._stream_product_details(
+            product_id,
+            f"{self.base_url}/item/{product_id}.html",
+            ".product-title",
+            """
                 () => {
                     return {
                         title: document.querySelector('.product-title')?.textContent.trim(),
                         price: document.querySelector('.product-price-value')?.textContent,
-                        description: document.querySelector('.product-description')?.textContent.trim(),
                         rating: document.querySelector('.overview-rating-average')?.textContent,
-                        availability: document.querySelector('.product-quantity-tip')?.textContent.trim(),
+                        availability: document.querySelector('.product-quantity-tip')?.textContent.trim()
+                    }
+                }
+            """,
+            """
+                () => {
+                    return {
+                        description: document.querySelector('.product-description')?.textContent.trim(),
                         shipping: document.querySelector('.product-shipping-info')?.textContent.trim()
                     }
                 }
-            """)
-            
-            details["id"] = product_id
-            return details
-            
-        except Exception as e:
-            logging.error(f"Failed to get AliExpress product details: {str(e)}")
-            return {}
+            """,
+            page
+        ):
+            yield part
+
+    async def _submit_add_to_cart(self, product_id: str, quantity: int = 1, wait_for_request: bool = True) -> Optional[bool]:
+        """Open an AliExpress product page and click add to cart"""
+        await self._goto(f"{self.base_url}/item/{product_id}.html")
+        
+        # Set quantity if needed
+        if quantity > 1:
+            await self._safe_type(".next-input input[type='number']", str(quantity))
+        
+        # Click add to cart button, optionally waiting for the cart request it makes
+        if not wait_for_request:
+            return await self._safe_click(".add-to-cart-button")
+        return await self._click_and_wait_for_response(".add-to-cart-button", r"addcart|shopcart")
+
+    async def _cart_quantities(self) -> Dict[str, Optional[int]]:
+        """Return the quantity of each product in the AliExpress cart"""
+        return await self._read_cart_quantities(
+            f"{self.base_url}/shopcart/list", 'a[href*="/item/"]', r"(\d+)\.html", ".next-input input[type='number']"
+        )
 
     async def add_to_cart(self, product_id: str, quantity: int = 1) -> bool:
         """Add a product to the AliExpress shopping cart"""
         try:
-            await self.page.goto(f"{self.base_url}/item/{product_id}.html")
-            
-            # Set quantity if needed
-            if quantity > 1:
-                await self._safe_type(".next-input input[type='number']", str(quantity))
-            
-            # Click add to cart button
-            await self._safe_click(".add-to-cart-button")
+            await self._submit_add_to_cart(product_id, quantity, wait_for_request=False)
             
             # Verify product was added successfully
             try:
@@ -139,7 +172,7 @@ class AliExpressAgent(EcommerceAgent):
         """Place an order for items in the cart"""
         try:
             # Go to cart
-            await self.page.goto(f"{self.base_url}/shopcart/list")
+            await self._goto(f"{self.base_url}/shopcart/list")
             
             # Select all items
             await self._safe_click(".select-all-items input")
@@ -1,5 +1,6 @@
 from .ecommerce_agent import EcommerceAgent
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 import logging
 import re
 import json
@@ -12,7 +13,7 @@ class AmazonAgent(EcommerceAgent):
     async def login(self, credentials: Dict[str, str]):
         """Login to Amazon"""
         try:
-            await self.page.goto(f"{self.base_url}/signin")
+            await self._goto(f"{self.base_url}/signin")
             
             # Enter email
             await self._safe_type("#ap_email", credentials["email"])
@@ -35,27 +36,40 @@ class AmazonAgent(EcommerceAgent):
             logging.error(f"Failed to login to Amazon: {str(e)}")
             return False
 
+    def _search_url(self, query: str, filters: Optional[Dict] = None) -> str:
+        """Construct search URL with filters"""
+        search_url = f"{self.base_url}/s?k={query}"
+        if filters:
+            if filters.get("min_price"):
+                search_url += f"&low-price={filters['min_price']}"
+            if filters.get("max_price"):
+                search_url += f"&high-price={filters['max_price']}"
+        return search_url
+
     async def search(self, query: str, filters: Optional[Dict] = None) -> List[Dict]:
         """Search for products on Amazon"""
         try:
-            # Construct search URL with filters
-            search_url = f"{self.base_url}/s?k={query}"
-            if filters:
-                if filters.get("min_price"):
-                    search_url += f"&low-price={filters['min_price']}"
-                if filters.get("max_price"):
-                    search_url += f"&high-price={filters['max_price']}"
-                
-            await self.page.goto(search_url)
-            
-            # Wait for search results
-            await self.page.wait_for_selector("[data-component-type='s-search-result']")
+            # Large batches: one round trip per poll instead of per ten cards
+            products = []
+            async for batch in self.search_stream(query, filters, batch_size=500):
+                products.extend(batch)
+            return products
             
-            # Extract product information
-            products = await self.page.evaluate("""
-                () => {
+        except Exception as e:
+            logging.error(f"Failed to search Amazon: {str(e)}")
+            return []
+
+    async def search_stream(self, query: str, filters: Optional[Dict] = None, batch_size: int = 10):
+        """Search for products on Amazon, yielding results as they are extracted"""
+        # Extract product information one batch of result cards at a time
+        async for batch in self._stream_search_results(
+            self._search_url(query, filters),
+            "[data-component-type='s-search-result']",
+            """
+                ([start, count]) => {
                     const results = [];
-                    document.querySelectorAll("[data-component-type='s-search-result']").forEach(item => {
+                    const items = document.querySelectorAll("[data-component-type='s-search-result']");
+                    Array.from(items).slice(start, start + count).forEach(item => {
                         const title = item.querySelector("h2 span")?.textContent;
                         const price = item.querySelector(".a-price-whole")?.textContent;
                         const asin = item.getAttribute("data-asin");
@@ -72,57 +86,101 @@ class AmazonAgent(EcommerceAgent):
                             });
                         }
                     });
-                    return results;
+                    return {items: results, next: Math.min(start + count, items.length), total: items.length};
                 }
-            """)
-            
-            return products
-            
-        except Exception as e:
-            logging.error(f"Failed to search Amazon: {str(e)}")
-            return []
+            """,
+            batch_size
+        ):
+            yield batch
 
-    async def get_product_details(self, product_id: str) -> Dict:
+    async def get_product_details(self, product_id: str, page=None) -> Dict:
         """Get detailed information about a specific Amazon product"""
         try:
-            await self.page.goto(f"{self.base_url}/dp/{product_id}")
-            
-            # Wait for product details to load
-            await self.page.wait_for_selector("#productTitle")
+            details = {}
+            async for part in self.get_product_details_stream(product_id, page):
+                details.update(part)
+            return details
             
-            # Extract product details
-            details = await self.page.evaluate("""
+        except Exception as e:
+            logging.error(f"Failed to get Amazon product details: {str(e)}")
+            return {}
+
+    async def get_product_details_stream(self, product_id: str, page=None):
+        """Get Amazon product details, yielding the summary fields before the rest"""
+        async for part in self._stream_product_details(
+            product_id,
+            f"{self.base_url}/dp/{product_id}",
+            "#productTitle",
+            """
                 () => {
                     return {
                         title: document.querySelector("#productTitle")?.textContent.trim(),
                         price: document.querySelector(".a-price-whole")?.textContent,
-                        description: document.querySelector("#productDescription")?.textContent.trim(),
                         rating: document.querySelector("#acrPopover")?.getAttribute("title"),
-                        availability: document.querySelector("#availability")?.textContent.trim(),
+                        availability: document.querySelector("#availability")?.textContent.trim()
+                    }
+                }
+            """,
+            """
+                () => {
+                    return {
+                        description: document.querySelector("#productDescription")?.textContent.trim(),
                         features: Array.from(document.querySelectorAll("#feature-bullets li")).map(li => li.textContent.trim())
                     }
                 }
-            """)
-            
-            details["id"] = product_id
-            return details
-            
-        except Exception as e:
-            logging.error(f"Failed to get Amazon product details: {str(e)}")
-            return {}
+            """,
+            page
+        ):
+            yield part
+
+    async def _submit_add_to_cart(self, product_id: str, quantity: int = 1, wait_for_request: bool = True) -> Optional[bool]:
+        """Open an Amazon product page and click add to cart"""
+        await self._goto(f"{self.base_url}/dp/{product_id}")
+        
+        # Set quantity if needed
+        if quantity > 1:
+            await self._safe_click("#a-autoid-0-announce")
+            await self._safe_click(f"#quantity_{quantity}")
+        
+        # Click add to cart button; it submits a form, so wait for the page it loads
+        if not wait_for_request:
+            return await self._safe_click("#add-to-cart-button")
+        return await self._click_and_wait_for_navigation("#add-to-cart-button")
+
+    async def _submit_many_to_cart(self, items: List[Tuple[str, int]]) -> Dict[str, str]:
+        """Add all items through Amazon's multi-item cart add URL"""
+        params = {}
+        for i, (product_id, quantity) in enumerate(items, start=1):
+            params[f"ASIN.{i}"] = product_id
+            params[f"Quantity.{i}"] = quantity
+        await self._goto(f"{self.base_url}/gp/aws/cart/add.html?{urlencode(params)}")
+        
+        # Confirm the items listed on the add page
+        if not await self._click_and_wait_for_navigation("input[name='add']"):
+            logging.error("Amazon multi-item cart add page unavailable, adding items one by one")
+            return await super()._submit_many_to_cart(items)
+        return {}
+
+    async def _cart_quantities(self) -> Dict[str, Optional[int]]:
+        """Return the quantity of each ASIN in the active Amazon cart"""
+        await self._goto(f"{self.base_url}/gp/cart/view.html")
+        return await self.page.evaluate("""
+            () => {
+                const quantities = {};
+                document.querySelectorAll("#sc-active-cart [data-asin][data-quantity]").forEach(item => {
+                    const asin = item.getAttribute("data-asin");
+                    if (asin) {
+                        quantities[asin] = (quantities[asin] || 0) + (parseInt(item.getAttribute("data-quantity")) || 0);
+                    }
+                });
+                return quantities;
+            }
+        """)
 
     async def add_to_cart(self, product_id: str, quantity: int = 1) -> bool:
         """Add a product to the Amazon shopping cart"""
         try:
-            await self.page.goto(f"{self.base_url}/dp/{product_id}")
-            
-            # Set quantity if needed
-            if quantity > 1:
-                await self._safe_click("#a-autoid-0-announce")
-                await self._safe_click(f"#quantity_{quantity}")
-            
-            # Click add to cart button
-            await self._safe_click("#add-to-cart-button")
+            await self._submit_add_to_cart(product_id, quantity, wait_for_request=False)
             
             # Verify product was added successfully
             try:
@@ -139,7 +197,7 @@ class AmazonAgent(EcommerceAgent):
         """Place an order for items in the cart"""
         try:
             # Go to cart
-            await self.page.goto(f"{self.base_url}/gp/cart/view.html")
+            await self._goto(f"{self.base_url}/gp/cart/view.html")
             
             # Proceed to checkout
             await self._safe_click("#sc-buy-box-ptc-button")
@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
-from playwright.async_api import async_playwright
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import asyncio
 import logging
 import json
 import os
+import re
+import time
 
 class EcommerceAgent(ABC):
     def __init__(self, platform: str):
@@ -12,22 +15,146 @@ class EcommerceAgent(ABC):
         self.context = None
         self.page = None
         self.logged_in = False
+        # Agent methods drive self.page, so callers serialize on this lock
+        self.page_lock = asyncio.Lock()
+
+        # A persistent profile keeps the browser's disk cache across restarts
+        profile_root = os.getenv("BROWSER_PROFILE_DIR")
+        self.profile_dir = os.path.join(profile_root, platform) if profile_root else None
+        self.keep_warm_interval = float(os.getenv("KEEP_WARM_INTERVAL", "0"))
+        self.post_idle_threshold = float(os.getenv("POST_IDLE_THRESHOLD", "60"))
+        self.playwright = None
+        self._warm_page = None
+        self._keep_warm_task = None
+        self._last_navigation = None
+        self.metrics = {
+            "persistent_profile": self.profile_dir is not None,
+            "keep_warm_interval": self.keep_warm_interval,
+            "initialize_ms": None,
+            "first_navigation_ms": None,
+            "post_idle_navigation": {"count": 0, "total_ms": 0.0, "last_ms": None},
+            "warm_navigation": {"count": 0, "total_ms": 0.0, "last_ms": None},
+            "background_navigation": {"count": 0, "total_ms": 0.0, "last_ms": None},
+            "keep_warm_pings": 0,
+            "keep_warm_failures": 0,
+        }
         
     async def initialize(self):
         """Initialize the browser and create a new context"""
         try:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=True)
-            self.context = await self.browser.new_context()
-            self.page = await self.context.new_page()
+            start = time.monotonic()
+            self.playwright = await async_playwright().start()
+            if self.profile_dir:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                try:
+                    self.context = await self.playwright.chromium.launch_persistent_context(self.profile_dir, headless=True)
+                except Exception as e:
+                    # Chromium locks a profile to one process, e.g. app.py or mcp_server.py
+                    raise RuntimeError(
+                        f"Could not open browser profile {self.profile_dir}; it may be in use by another "
+                        f"process, which needs its own BROWSER_PROFILE_DIR: {str(e)}"
+                    ) from e
+                self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+            else:
+                self.browser = await self.playwright.chromium.launch(headless=True)
+                self.context = await self.browser.new_context()
+                self.page = await self.context.new_page()
+            self.metrics["initialize_ms"] = (time.monotonic() - start) * 1000
+
+            if self.keep_warm_interval > 0:
+                self._keep_warm_task = asyncio.create_task(self._keep_warm())
         except Exception as e:
             logging.error(f"Failed to initialize browser: {str(e)}")
             raise
 
+    async def new_page(self):
+        """Open an additional page in the agent's browser context"""
+        return await self.context.new_page()
+
     async def close(self):
         """Clean up resources"""
+        if self._keep_warm_task:
+            self._keep_warm_task.cancel()
+            await asyncio.gather(self._keep_warm_task, return_exceptions=True)
         if self.browser:
             await self.browser.close()
+        elif self.context:
+            # Closing a persistent context flushes the profile to disk
+            await self.context.close()
+        if self.playwright:
+            await self.playwright.stop()
+
+    async def _goto(self, url: str, page=None, **kwargs):
+        """Navigate page (the interactive page by default), recording latency metrics
+
+        Navigations on other pages, such as prefetching, are recorded in a
+        separate bucket and do not count as activity, so they neither skew
+        the interactive latencies nor hide idle periods.
+        """
+        page = page or self.page
+        start = time.monotonic()
+        if page is not self.page:
+            response = await page.goto(url, **kwargs)
+            self._record_navigation("background_navigation", (time.monotonic() - start) * 1000)
+            return response
+
+        idle = start - self._last_navigation if self._last_navigation is not None else None
+        response = await page.goto(url, **kwargs)
+        elapsed_ms = (time.monotonic() - start) * 1000
+        self._last_navigation = time.monotonic()
+
+        if idle is None:
+            self.metrics["first_navigation_ms"] = elapsed_ms
+        else:
+            kind = "post_idle_navigation" if idle >= self.post_idle_threshold else "warm_navigation"
+            self._record_navigation(kind, elapsed_ms)
+        return response
+
+    def _record_navigation(self, kind: str, elapsed_ms: float):
+        summary = self.metrics[kind]
+        summary["count"] += 1
+        summary["total_ms"] += elapsed_ms
+        summary["last_ms"] = elapsed_ms
+
+    def get_metrics(self) -> Dict:
+        """Navigation latency metrics, with averages for each navigation kind"""
+        metrics = dict(self.metrics)
+        for kind in ("post_idle_navigation", "warm_navigation", "background_navigation"):
+            summary = dict(metrics[kind])
+            summary["avg_ms"] = summary["total_ms"] / summary["count"] if summary["count"] else None
+            metrics[kind] = summary
+        return metrics
+
+    async def _keep_warm(self):
+        """Periodically touch the platform origin while the agent is idle
+
+        Pings run from a separate page in the same context, so they reuse
+        and refresh the connections and DNS entries that later navigations
+        need. They do not count as activity for the post-idle metrics.
+        """
+        while True:
+            await asyncio.sleep(self.keep_warm_interval)
+            if self._last_navigation is not None and time.monotonic() - self._last_navigation < self.keep_warm_interval:
+                continue
+            try:
+                if self._warm_page is None or self._warm_page.is_closed():
+                    self._warm_page = await self.new_page()
+                    try:
+                        await self._warm_page.goto(self.base_url, wait_until="domcontentloaded")
+                    except Exception:
+                        # Open a fresh page next time rather than pinging from a blank one
+                        await self._warm_page.close()
+                        self._warm_page = None
+                        raise
+                else:
+                    await self._warm_page.evaluate(
+                        "(url) => fetch(url, {method: 'HEAD', mode: 'no-cors', cache: 'no-store', credentials: 'include'}).then(r => r.status)",
+                        self.base_url + "/"
+                    )
+                self.metrics["keep_warm_pings"] += 1
+            except Exception as e:
+                self.metrics["keep_warm_failures"] += 1
+                logging.error(f"Keep-warm ping to {self.platform} failed: {str(e)}")
 
     @abstractmethod
     async def login(self, credentials: Dict[str, str]):
@@ -40,8 +167,18 @@ class EcommerceAgent(ABC):
         pass
 
     @abstractmethod
-    async def get_product_details(self, product_id: str) -> Dict:
-        """Get detailed information about a specific product"""
+    def search_stream(self, query: str, filters: Optional[Dict] = None, batch_size: int = 10) -> AsyncIterator[List[Dict]]:
+        """Search for products, yielding batches of results as they are extracted"""
+        pass
+
+    @abstractmethod
+    async def get_product_details(self, product_id: str, page=None) -> Dict:
+        """Get detailed information about a specific product, on page if given"""
+        pass
+
+    @abstractmethod
+    def get_product_details_stream(self, product_id: str, page=None) -> AsyncIterator[Dict]:
+        """Get product details, yielding the summary fields before the rest"""
         pass
 
     @abstractmethod
@@ -49,11 +186,189 @@ class EcommerceAgent(ABC):
         """Add a product to the shopping cart"""
         pass
 
+    @abstractmethod
+    async def _submit_add_to_cart(self, product_id: str, quantity: int = 1, wait_for_request: bool = True) -> Optional[bool]:
+        """Open a product page and click add to cart
+
+        With wait_for_request, also wait for the request the click makes and
+        return whether the platform accepted it (None if that is unknown).
+        """
+        pass
+
+    @abstractmethod
+    async def _cart_quantities(self) -> Dict[str, Optional[int]]:
+        """Open the cart page and return the quantity of each product it contains (None if unreadable)"""
+        pass
+
+    async def add_many_to_cart(self, items: List[Tuple[str, int]]) -> Dict:
+        """Add several products to the cart, comparing the cart before and after the pass
+
+        An item counts as added only if its cart quantity rose by at least
+        the requested amount (summed over repeated product IDs). Items whose
+        cart quantity cannot be read are reported with an error.
+        """
+        outcomes = [{"product_id": product_id, "quantity": quantity, "added": False} for product_id, quantity in items]
+        try:
+            before = await self._cart_quantities()
+            errors = await self._submit_many_to_cart(items)
+            after = await self._cart_quantities()
+        except Exception as e:
+            logging.error(f"Failed to add products to {self.platform} cart: {str(e)}")
+            for outcome in outcomes:
+                outcome["error"] = str(e)
+            return {"success": False, "items": outcomes}
+
+        requested: Dict[str, int] = {}
+        for product_id, quantity in items:
+            requested[product_id] = requested.get(product_id, 0) + quantity
+
+        for outcome in outcomes:
+            product_id = outcome["product_id"]
+            old, new = before.get(product_id, 0), after.get(product_id, 0)
+            outcome["cart_quantity"] = new
+            if old is None or new is None:
+                outcome["error"] = errors.get(product_id, "Could not read cart quantity")
+                continue
+            outcome["added"] = new - old >= requested[product_id]
+            if product_id in errors:
+                outcome["error"] = errors[product_id]
+        return {
+            "success": all(outcome["added"] for outcome in outcomes),
+            "items": outcomes
+        }
+
+    async def _submit_many_to_cart(self, items: List[Tuple[str, int]]) -> Dict[str, str]:
+        """Submit items one product page at a time, returning errors by product ID
+
+        Platforms with a multi-add URL override this to add everything in
+        a single navigation.
+        """
+        errors = {}
+        for product_id, quantity in items:
+            try:
+                # None means the request was not seen; the cart comparison decides
+                if await self._submit_add_to_cart(product_id, quantity) is False:
+                    errors[product_id] = "Add to cart was not accepted"
+            except Exception as e:
+                errors[product_id] = str(e)
+        return errors
+
+    async def _click_and_wait_for_response(self, selector: str, url_pattern: str, timeout: int = 10000) -> Optional[bool]:
+        """Click an element and wait for the POST it triggers to a URL matching url_pattern
+
+        Used for XHR add-to-cart buttons, so the next navigation cannot
+        abort the request. Returns whether the response was successful, or
+        None if no matching request was seen within the timeout.
+        """
+        element = await self.page.wait_for_selector(selector, timeout=5000)
+        try:
+            async with self.page.expect_response(
+                lambda response: response.request.method == "POST" and re.search(url_pattern, response.url, re.IGNORECASE),
+                timeout=timeout
+            ) as response_info:
+                await element.click()
+            response = await response_info.value
+        except PlaywrightTimeoutError:
+            logging.error(f"No {self.platform} request matching {url_pattern} after clicking {selector}")
+            return None
+        return response.ok
+
+    async def _click_and_wait_for_navigation(self, selector: str) -> bool:
+        """Click an element that submits a form and wait for the page it loads"""
+        try:
+            element = await self.page.wait_for_selector(selector, timeout=5000)
+        except Exception as e:
+            logging.error(f"Failed to click element {selector}: {str(e)}")
+            return False
+        async with self.page.expect_navigation(wait_until="domcontentloaded"):
+            await element.click()
+        return True
+
+    async def _read_cart_quantities(self, cart_url: str, link_selector: str, id_pattern: str,
+                                    quantity_selector: str) -> Dict[str, Optional[int]]:
+        """Open a cart page and read each product's quantity
+
+        Products are found by their links; a product's quantity is the value
+        of the quantity_selector input in the link's nearest enclosing cart
+        row, or None if no such input holds a number.
+        """
+        await self._goto(cart_url)
+        return await self.page.evaluate("""
+            ([linkSelector, idPattern, quantitySelector]) => {
+                const quantities = {};
+                document.querySelectorAll(linkSelector).forEach(link => {
+                    const id = link.href.match(new RegExp(idPattern))?.[1];
+                    if (!id || id in quantities) return;
+                    let row = link.parentElement;
+                    for (let depth = 0; row && depth < 8 && !row.querySelector(quantitySelector); depth++) {
+                        row = row.parentElement;
+                    }
+                    const quantity = parseInt(row?.querySelector(quantitySelector)?.value);
+                    quantities[id] = Number.isNaN(quantity) ? null : quantity;
+                });
+                return quantities;
+            }
+        """, [link_selector, id_pattern, quantity_selector])
+
     @abstractmethod
     async def place_order(self, shipping_address: Dict[str, str], payment_info: Dict[str, str]) -> Dict:
         """Place an order for items in the cart"""
         pass
 
+    async def _stream_search_results(self, search_url: str, result_selector: str, extract_script: str, batch_size: int = 10,
+                                     poll_interval: float = 0.25, settle_polls: int = 2, settle_timeout: float = 10.0) -> AsyncIterator[List[Dict]]:
+        """Open a search page and yield products as their result cards render
+
+        The first cards are yielded as soon as they appear. After that the
+        page is polled for cards rendered later (hydration, lazy loading)
+        until it has fully loaded and the card count has not grown for
+        settle_polls polls, or settle_timeout passes.
+
+        extract_script receives [start, count] and must return
+        {items, next, total} for the result cards in that range.
+        """
+        await self._goto(search_url, wait_until="domcontentloaded")
+        await self.page.wait_for_selector(result_selector)
+
+        start = 0
+        settled = 0
+        deadline = time.monotonic() + settle_timeout
+        while True:
+            batch = await self.page.evaluate(extract_script, [start, batch_size])
+            if batch["items"]:
+                yield batch["items"]
+            if batch["next"] > start:
+                start = batch["next"]
+                settled = 0
+                continue
+
+            # Caught up with the rendered cards; wait for late ones
+            if time.monotonic() >= deadline:
+                break
+            if await self.page.evaluate("document.readyState") == "complete":
+                settled += 1
+                if settled >= settle_polls:
+                    break
+            await asyncio.sleep(poll_interval)
+
+    async def _stream_product_details(self, product_id: str, product_url: str, ready_selector: str, summary_script: str, details_script: str, page=None) -> AsyncIterator[Dict]:
+        """Open a product page and yield summary fields, then the remaining details
+
+        page defaults to the agent's interactive page; background work such
+        as prefetching passes its own page from the same context.
+        """
+        page = page or self.page
+        await self._goto(product_url, page, wait_until="domcontentloaded")
+        await page.wait_for_selector(ready_selector)
+
+        summary = await page.evaluate(summary_script)
+        summary["id"] = product_id
+        yield summary
+
+        # Descriptions and feature lists are often rendered late
+        await page.wait_for_load_state("load")
+        yield await page.evaluate(details_script)
+
     async def _safe_click(self, selector: str, timeout: int = 5000):
         """Safely click an element with retry logic"""
         try:
@@ -1,5 +1,5 @@
 from .ecommerce_agent import EcommerceAgent
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 import re
 import json
@@ -12,7 +12,7 @@ class FlipkartAgent(EcommerceAgent):
     async def login(self, credentials: Dict[str, str]):
         """Login to Flipkart"""
         try:
-            await self.page.goto(f"{self.base_url}/account/login")
+            await self._goto(f"{self.base_url}/account/login")
             
             # Enter mobile number/email
             await self._safe_type("input[class='_2IX_2- VJZDxU']", credentials["username"])
@@ -32,27 +32,40 @@ class FlipkartAgent(EcommerceAgent):
             logging.error(f"Failed to login to Flipkart: {str(e)}")
             return False
 
+    def _search_url(self, query: str, filters: Optional[Dict] = None) -> str:
+        """Construct search URL with filters"""
+        search_url = f"{self.base_url}/search?q={query}"
+        if filters:
+            if filters.get("min_price"):
+                search_url += f"&p%5B%5D=facets.price_range.from%3D{filters['min_price']}"
+            if filters.get("max_price"):
+                search_url += f"&p%5B%5D=facets.price_range.to%3D{filters['max_price']}"
+        return search_url
+
     async def search(self, query: str, filters: Optional[Dict] = None) -> List[Dict]:
         """Search for products on Flipkart"""
         try:
-            # Construct search URL
-            search_url = f"{self.base_url}/search?q={query}"
-            if filters:
-                if filters.get("min_price"):
-                    search_url += f"&p%5B%5D=facets.price_range.from%3D{filters['min_price']}"
-                if filters.get("max_price"):
-                    search_url += f"&p%5B%5D=facets.price_range.to%3D{filters['max_price']}"
-            
-            await self.page.goto(search_url)
-            
-            # Wait for search results
-            await self.page.wait_for_selector("div[class='_1AtVbE col-12-12']")
+            # Large batches: one round trip per poll instead of per ten cards
+            products = []
+            async for batch in self.search_stream(query, filters, batch_size=500):
+                products.extend(batch)
+            return products
             
-            # Extract product information
-            products = await self.page.evaluate("""
-                () => {
+        except Exception as e:
+            logging.error(f"Failed to search Flipkart: {str(e)}")
+            return []
+
+    async def search_stream(self, query: str, filters: Optional[Dict] = None, batch_size: int = 10):
+        """Search for products on Flipkart, yielding results as they are extracted"""
+        # Extract product information one batch of result cards at a time
+        async for batch in self._stream_search_results(
+            self._search_url(query, filters),
+            "div[class='_1AtVbE col-12-12']",
+            """
+                ([start, count]) => {
                     const results = [];
-                    document.querySelectorAll("div[class='_1AtVbE col-12-12']").forEach(item => {
+                    const items = document.querySelectorAll("div[class='_1AtVbE col-12-12']");
+                    Array.from(items).slice(start, start + count).forEach(item => {
                         const title = item.querySelector("div[class='_4rR01T']")?.textContent;
                         const price = item.querySelector("div[class='_30jeq3 _1_WHN1']")?.textContent;
                         const link = item.querySelector("a[class='_1fQZEK']")?.href;
@@ -70,52 +83,84 @@ class FlipkartAgent(EcommerceAgent):
                             });
                         }
                     });
-                    return results;
+                    return {items: results, next: Math.min(start + count, items.length), total: items.length};
                 }
-            """)
-            
-            return products
-            
-        except Exception as e:
-            logging.error(f"Failed to search Flipkart: {str(e)}")
-            return []
+            """,
+            batch_size
+        ):
+            yield batch
 
-    async def get_product_details(self, product_id: str) -> Dict:
+    async def get_product_details(self, product_id: str, page=None) -> Dict:
         """Get detailed information about a specific Flipkart product"""
         try:
-            await self.page.goto(f"{self.base_url}/p/{product_id}")
-            
-            # Wait for product details to load
-            await self.page.wait_for_selector("span[class='B_NuCI']")
+            details = {}
+            async for part in self.get_product_details_stream(product_id, page):
+                details.update(part)
+            return details
             
-            # Extract product details
-            details = await self.page.evaluate("""
+        except Exception as e:
+            logging.error(f"Failed to get Flipkart product details: {str(e)}")
+            return {}
+
+    async def get_product_details_stream(self, product_id: str, page=None):
+        """Get Flipkart product details, yielding the summary fields before the rest"""
+        async for part in self._stream_product_details(
+            product_id,
+            f"{self.base_url}/p/{product_id}",
+            "span[class='B_NuCI']",
+            """
                 () => {
                     return {
                         title: document.querySelector("span[class='B_NuCI']")?.textContent.trim(),
                         price: document.querySelector("div[class='_30jeq3 _16Jk6d']")?.textContent,
-                        description: document.querySelector("div[class='_1mXcCf RmoJUa']")?.textContent.trim(),
                         rating: document.querySelector("div[class='_3LWZlK']")?.textContent,
-                        availability: document.querySelector("div[class='_16FRp0']")?.textContent.trim(),
+                        availability: document.querySelector("div[class='_16FRp0']")?.textContent.trim()
+                    }
+                }
+            """,
+            """
+                () => {
+                    return {
+                        description: document.querySelector("div[class='_1mXcCf RmoJUa']")?.textContent.trim(),
                         highlights: Array.from(document.querySelectorAll("li[class='_21Ahn-']")).map(li => li.textContent.trim())
                     }
                 }
-            """)
-            
-            details["id"] = product_id
-            return details
-            
-        except Exception as e:
-            logging.error(f"Failed to get Flipkart product details: {str(e)}")
-            return {}
+            """,
+            page
+        ):
+            yield part
+
+    async def _submit_add_to_cart(self, product_id: str, quantity: int = 1, wait_for_request: bool = True) -> Optional[bool]:
+        """Open a Flipkart product page and click add to cart"""
+        await self._goto(f"{self.base_url}/p/{product_id}")
+        
+        # Click add to cart button, optionally waiting for the cart API call it makes
+        if not wait_for_request:
+            return await self._safe_click("button._2KpZ6l._2U9uOA._3v1-ww")
+        return await self._click_and_wait_for_response("button._2KpZ6l._2U9uOA._3v1-ww", r"/api/.*cart")
+
+    async def _submit_many_to_cart(self, items: List[Tuple[str, int]]) -> Dict[str, str]:
+        """Submit items one by one; the product page adds a single unit, so larger quantities are rejected"""
+        errors = {}
+        single_items = []
+        for product_id, quantity in items:
+            if quantity > 1:
+                errors[product_id] = "Flipkart adds one unit per item; quantity > 1 is not supported"
+            else:
+                single_items.append((product_id, quantity))
+        errors.update(await super()._submit_many_to_cart(single_items))
+        return errors
+
+    async def _cart_quantities(self) -> Dict[str, Optional[int]]:
+        """Return the quantity of each product in the Flipkart cart"""
+        return await self._read_cart_quantities(
+            f"{self.base_url}/viewcart", "a[href*='pid=']", "pid=([^&]+)", "input._253qQJ, input[type='number']"
+        )
 
     async def add_to_cart(self, product_id: str, quantity: int = 1) -> bool:
         """Add a product to the Flipkart shopping cart"""
         try:
-            await self.page.goto(f"{self.base_url}/p/{product_id}")
-            
-            # Click add to cart button
-            await self._safe_click("button._2KpZ6l._2U9uOA._3v1-ww")
+            await self._submit_add_to_cart(product_id, quantity, wait_for_request=False)
             
             # Verify product was added successfully
             try:
@@ -132,7 +177,7 @@ class FlipkartAgent(EcommerceAgent):
         """Place an order for items in the cart"""
         try:
             # Go to cart
-            await self.page.goto(f"{self.base_url}/viewcart")
+            await self._goto(f"{self.base_url}/viewcart")
             
             # Click place order button
             await self._safe_click("button._2KpZ6l._2ObVJD._3AWRsL")
@@ -1,12 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import Optional, Dict, List
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Optional, Dict, List
 import uvicorn
 from agents import AgentFactory
+from image_proxy import ImageProxy
+from models import CartItem
+from search_query import SearchOptions, apply_search_options, apply_search_options_stream
+from prefetch import ProductPrefetcher
 import logging
-import json
+import orjson
+import os
 from datetime import datetime
 
 # Configure logging
@@ -18,10 +23,20 @@ app = FastAPI(title="E-commerce MCP Server")
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Thumbnail proxy for marketplace product images
+image_proxy = ImageProxy()
+
+# Optional speculative fetch of product details for the top search results
+prefetcher = ProductPrefetcher(
+    top_n=int(os.getenv("PREFETCH_TOP_N", "0")),
+    ttl=float(os.getenv("PREFETCH_TTL", "120"))
+)
+
 class SearchRequest(BaseModel):
     platform: str
     query: str
     filters: Optional[Dict] = None
+    options: Optional[SearchOptions] = None
 
 class ProductRequest(BaseModel):
     platform: str
@@ -32,11 +47,20 @@ class CartRequest(BaseModel):
     product_id: str
     quantity: int = 1
 
+class BulkCartRequest(BaseModel):
+    platform: str
+    items: List[CartItem] = Field(..., min_length=1)
+
 class OrderRequest(BaseModel):
     platform: str
     shipping_address: Dict[str, str]
     payment_info: Dict[str, str]
 
+def result_ids(results: List) -> List[str]:
+    """Product IDs of search results in display order"""
+    ids = [r.get("id") if isinstance(r, dict) else r.id for r in results]
+    return [product_id for product_id in ids if product_id]
+
 @app.get("/")
 async def root():
     """Serve the web interface"""
@@ -47,12 +71,18 @@ async def search_products(request: SearchRequest):
     """Search for products on the specified platform"""
     try:
         agent = await AgentFactory.get_agent(request.platform)
-        results = await agent.search(request.query, request.filters)
-        return {
+        with prefetcher.interactive():
+            async with agent.page_lock:
+                results = await agent.search(request.query, request.filters)
+        page, total = apply_search_options(results, request.options)
+        # Projections without "id" fall back to the platform's own ranking
+        prefetcher.schedule(agent.platform, agent, result_ids(page) or result_ids(results))
+        return ORJSONResponse({
             "status": "success",
             "platform": request.platform,
-            "results": results
-        }
+            "total": total,
+            "results": page
+        })
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -62,7 +92,11 @@ async def get_product_details(request: ProductRequest):
     """Get detailed information about a specific product"""
     try:
         agent = await AgentFactory.get_agent(request.platform)
-        details = await agent.get_product_details(request.product_id)
+        with prefetcher.interactive():
+            details = await prefetcher.lookup(agent.platform, request.product_id)
+            if details is None:
+                async with agent.page_lock:
+                    details = await agent.get_product_details(request.product_id)
         return {
             "status": "success",
             "platform": request.platform,
@@ -72,12 +106,82 @@ async def get_product_details(request: ProductRequest):
         logger.error(f"Product details error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def stream_events(http_request: Request, events: AsyncIterator[Dict]) -> StreamingResponse:
+    """Stream events as Server-Sent Events if the client accepts them, NDJSON otherwise"""
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def body():
+        async for event in events:
+            if sse:
+                yield f"event: {event['event']}\ndata: ".encode() + orjson.dumps(event) + b"\n\n"
+            else:
+                yield orjson.dumps(event) + b"\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/search/stream")
+async def search_products_stream(request: SearchRequest, http_request: Request):
+    """Stream search results as they are extracted"""
+    async def events():
+        try:
+            agent = await AgentFactory.get_agent(request.platform)
+            count = 0
+            ids = []
+            raw_ids = []
+
+            async def raw_batches():
+                # Keep the extracted IDs in case projection leaves "id" out of the results
+                async for batch in agent.search_stream(request.query, request.filters):
+                    raw_ids.extend(result_ids(batch))
+                    yield batch
+
+            with prefetcher.interactive():
+                async with agent.page_lock:
+                    async for batch in apply_search_options_stream(raw_batches(), request.options):
+                        count += len(batch)
+                        ids.extend(result_ids(batch))
+                        yield {"event": "results", "platform": request.platform, "results": batch}
+            prefetcher.schedule(agent.platform, agent, ids or raw_ids)
+            yield {"event": "done", "platform": request.platform, "count": count}
+        except Exception as e:
+            logger.error(f"Search stream error: {str(e)}")
+            yield {"event": "error", "platform": request.platform, "detail": str(e)}
+
+    return stream_events(http_request, events())
+
+@app.post("/product/stream")
+async def get_product_details_stream(request: ProductRequest, http_request: Request):
+    """Stream product details, summary fields first"""
+    async def events():
+        try:
+            agent = await AgentFactory.get_agent(request.platform)
+            with prefetcher.interactive():
+                cached = await prefetcher.lookup(agent.platform, request.product_id)
+                if cached is not None:
+                    yield {"event": "product", "platform": request.platform, "product": cached}
+                else:
+                    async with agent.page_lock:
+                        async for part in agent.get_product_details_stream(request.product_id):
+                            yield {"event": "product", "platform": request.platform, "product": part}
+            yield {"event": "done", "platform": request.platform}
+        except Exception as e:
+            logger.error(f"Product details stream error: {str(e)}")
+            yield {"event": "error", "platform": request.platform, "detail": str(e)}
+
+    return stream_events(http_request, events())
+
 @app.post("/cart/add")
 async def add_to_cart(request: CartRequest):
     """Add a product to the shopping cart"""
     try:
         agent = await AgentFactory.get_agent(request.platform)
-        success = await agent.add_to_cart(request.product_id, request.quantity)
+        with prefetcher.interactive():
+            async with agent.page_lock:
+                success = await agent.add_to_cart(request.product_id, request.quantity)
         return {
             "status": "success" if success else "error",
             "platform": request.platform,
@@ -87,12 +191,32 @@ async def add_to_cart(request: CartRequest):
         logger.error(f"Add to cart error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/cart/bulk")
+async def add_many_to_cart(request: BulkCartRequest):
+    """Add several products to the shopping cart in one pass"""
+    try:
+        agent = await AgentFactory.get_agent(request.platform)
+        items = [(item.product_id, item.quantity) for item in request.items]
+        with prefetcher.interactive():
+            async with agent.page_lock:
+                result = await agent.add_many_to_cart(items)
+        return {
+            "status": "success" if result["success"] else "error",
+            "platform": request.platform,
+            "items": result["items"]
+        }
+    except Exception as e:
+        logger.error(f"Bulk add to cart error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/order")
 async def place_order(request: OrderRequest):
     """Place an order on the specified platform"""
     try:
         agent = await AgentFactory.get_agent(request.platform)
-        result = await agent.place_order(request.shipping_address, request.payment_info)
+        with prefetcher.interactive():
+            async with agent.page_lock:
+                result = await agent.place_order(request.shipping_address, request.payment_info)
         return {
             "status": "success" if result["success"] else "error",
             "platform": request.platform,
@@ -103,10 +227,48 @@ async def place_order(request: OrderRequest):
         logger.error(f"Order placement error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/image")
+async def get_image(request: Request, url: str, width: int = Query(200, ge=16, le=1024)):
+    """Serve a cached thumbnail of a product image"""
+    try:
+        etag = image_proxy.etag(image_proxy.cache_key(url, width))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=86400, immutable"
+    }
+    # The ETag depends only on URL and width, so revalidation skips the cache read
+    if image_proxy.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        data, _ = await image_proxy.get_thumbnail(url, width)
+    except Exception as e:
+        logger.error(f"Image proxy error: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to fetch image: {str(e)}")
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Report browser navigation latency per platform and prefetch activity"""
+    return {
+        "agents": AgentFactory.get_metrics(),
+        "prefetch": prefetcher.get_stats()
+    }
+
+@app.get("/prefetch/stats")
+async def get_prefetch_stats():
+    """Report prefetch cache hit rate and queue activity"""
+    return prefetcher.get_stats()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources when shutting down"""
+    await prefetcher.close()
     await AgentFactory.close_all()
+    await image_proxy.close()
 
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,238 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from io import BytesIO
+from PIL import Image
+import aiohttp
+import asyncio
+import hashlib
+import logging
+import os
+
+# Only marketplace image CDNs may be fetched through the proxy
+ALLOWED_IMAGE_HOSTS = (
+    "media-amazon.com",
+    "ssl-images-amazon.com",
+    "flixcart.com",
+    "alicdn.com",
+    "aliexpress-media.com",
+)
+
+MAX_REDIRECTS = 3
+
+class ImageFetchError(Exception):
+    """Raised when the upstream image is too large or redirects somewhere disallowed"""
+    pass
+
+class ImageCache:
+    """Size-bounded on-disk LRU cache for thumbnails
+
+    The LRU index lives on the event loop; file reads, writes and
+    removals run in worker threads.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def _load_index(self):
+        """Rebuild the LRU order from files left by a previous run"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".jpg"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+        self._remove_files(self._evict())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes and mark the entry as recently used"""
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        try:
+            return await asyncio.to_thread(self._read, key)
+        except OSError:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)
+            return None
+
+    def _read(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            data = f.read()
+        # The mtime preserves LRU order across restarts
+        os.utime(self._path(key))
+        return data
+
+    async def put(self, key: str, data: bytes):
+        """Store bytes and evict least recently used entries over the limit"""
+        await asyncio.to_thread(self._write, key, data)
+        if key in self._entries:
+            self.total_bytes -= self._entries[key]
+        self._entries[key] = len(data)
+        self._entries.move_to_end(key)
+        self.total_bytes += len(data)
+        evicted = self._evict()
+        if evicted:
+            await asyncio.to_thread(self._remove_files, evicted)
+
+    def _write(self, key: str, data: bytes):
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+    def _evict(self) -> List[str]:
+        """Drop least recently used entries from the index, returning their keys"""
+        evicted = []
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove_files(self, keys: List[str]):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError as e:
+                logging.error(f"Failed to evict cached image {key}: {str(e)}")
+
+class ImageProxy:
+    """Fetches marketplace images over a pooled client and serves cached thumbnails"""
+
+    def __init__(self, cache_dir: str = "image_cache", max_cache_bytes: int = 256 * 1024 * 1024,
+                 max_image_bytes: int = 10 * 1024 * 1024, max_connections: int = 32, timeout: float = 10.0):
+        self.cache = ImageCache(cache_dir, max_cache_bytes)
+        self.max_image_bytes = max_image_bytes
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=8,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": "Mozilla/5.0 (compatible; ecommerce-mcp-image-proxy)"},
+            )
+        return self._session
+
+    @staticmethod
+    def _validate_url(url: str):
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        if parsed.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported image URL scheme: {parsed.scheme}")
+        if not any(host == allowed or host.endswith("." + allowed) for allowed in ALLOWED_IMAGE_HOSTS):
+            raise ValueError(f"Image host not allowed: {host}")
+
+    def cache_key(self, url: str, width: int) -> str:
+        """Validate url and return the cache key of its thumbnail"""
+        self._validate_url(url)
+        return hashlib.sha256(f"{url}|{width}".encode()).hexdigest()
+
+    @staticmethod
+    def etag(key: str) -> str:
+        # Thumbnails are immutable per URL and width, so the key identifies the content
+        return f'"{key[:32]}"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """Whether an If-None-Match header matches etag, using weak comparison"""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*":
+                return True
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == etag:
+                return True
+        return False
+
+    async def get_thumbnail(self, url: str, width: int) -> Tuple[bytes, str]:
+        """Return a JPEG thumbnail of the image at url and its ETag"""
+        key = self.cache_key(url, width)
+
+        data = await self.cache.get(key)
+        if data is None:
+            # Concurrent requests for the same thumbnail share one fetch
+            future = self._inflight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(self._fetch_and_store(key, url, width))
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            data = await asyncio.shield(future)
+
+        return data, self.etag(key)
+
+    async def _fetch(self, url: str) -> bytes:
+        """Download an image, re-checking the host allowlist on every redirect hop"""
+        session = await self._get_session()
+        for _ in range(MAX_REDIRECTS + 1):
+            async with session.get(url, allow_redirects=False) as response:
+                if response.status in (301, 302, 303, 307, 308):
+                    url = urljoin(url, response.headers.get("Location", ""))
+                    try:
+                        self._validate_url(url)
+                    except ValueError as e:
+                        raise ImageFetchError(f"Redirect rejected: {str(e)}")
+                    continue
+                response.raise_for_status()
+                if response.content_length and response.content_length > self.max_image_bytes:
+                    raise ImageFetchError(f"Image is {response.content_length} bytes")
+
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    data.extend(chunk)
+                    if len(data) > self.max_image_bytes:
+                        raise ImageFetchError(f"Image exceeds {self.max_image_bytes} bytes")
+                return bytes(data)
+        raise ImageFetchError(f"Too many redirects fetching image: {url}")
+
+    async def _fetch_and_store(self, key: str, url: str, width: int) -> bytes:
+        original = await self._fetch(url)
+        data = await asyncio.to_thread(self._resize, original, width)
+        await self.cache.put(key, data)
+        return data
+
+    @staticmethod
+    def _resize(data: bytes, width: int) -> bytes:
+        with Image.open(BytesIO(data)) as image:
+            image.thumbnail((width, width))
+            # JPEG has no alpha channel, so flatten transparency onto white
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                rgba = image.convert("RGBA")
+                flattened = Image.new("RGB", rgba.size, (255, 255, 255))
+                flattened.paste(rgba, mask=rgba.getchannel("A"))
+            else:
+                flattened = image.convert("RGB")
+            output = BytesIO()
+            flattened.save(output, format="JPEG", quality=80, optimize=True)
+            return output.getvalue()
+
+    async def close(self):
+        """Close the pooled HTTP client"""
+        if self._session and not self._session.closed:
+            await self._session.close()
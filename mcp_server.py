@@ -0,0 +1,118 @@
+from mcp.server.fastmcp import FastMCP, Context
+from typing import Annotated, Dict, List, Optional
+from pydantic import Field
+from agents import AgentFactory
+from models import CartItem
+from search_query import SearchOptions, apply_search_options
+import argparse
+import asyncio
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tool calls share the agents created by AgentFactory, so a session can
+# issue many calls (concurrently across platforms) over one connection.
+mcp = FastMCP("E-commerce MCP Server")
+
+@mcp.tool()
+async def search_products(platform: str, query: str, ctx: Context, filters: Optional[Dict] = None,
+                          options: Optional[SearchOptions] = None) -> Dict:
+    """Search for products on amazon, flipkart or aliexpress.
+
+    filters may hold min_price/max_price for the platform search page;
+    options filter, sort, paginate and project the extracted results.
+    Progress is reported as result batches are extracted.
+    """
+    agent = await AgentFactory.get_agent(platform)
+    results: List[Dict] = []
+    async with agent.page_lock:
+        async for batch in agent.search_stream(query, filters):
+            results.extend(batch)
+            await ctx.report_progress(len(results))
+    # Options run over the full result list so total supports offset/limit paging
+    page, total = apply_search_options(results, options)
+    return {
+        "platform": platform,
+        "total": total,
+        "results": page
+    }
+
+@mcp.tool()
+async def get_product_details(platform: str, product_id: str, ctx: Context) -> Dict:
+    """Get detailed information about a product by its platform product ID"""
+    agent = await AgentFactory.get_agent(platform)
+    details: Dict = {}
+    step = 0
+    async with agent.page_lock:
+        # Summary fields arrive first, then description and the rest
+        async for part in agent.get_product_details_stream(product_id):
+            step += 1
+            details.update(part)
+            await ctx.report_progress(step, 2)
+    return {
+        "platform": platform,
+        "product": details
+    }
+
+@mcp.tool()
+async def add_to_cart(platform: str, product_id: str, quantity: int = 1) -> Dict:
+    """Add a product to the shopping cart"""
+    agent = await AgentFactory.get_agent(platform)
+    async with agent.page_lock:
+        success = await agent.add_to_cart(product_id, quantity)
+    return {
+        "platform": platform,
+        "success": success
+    }
+
+@mcp.tool()
+async def add_many_to_cart(platform: str, items: Annotated[List[CartItem], Field(min_length=1)]) -> Dict:
+    """Add several products to the cart in one pass.
+
+    The result reports, per item, whether its cart quantity rose by the
+    requested amount.
+    """
+    agent = await AgentFactory.get_agent(platform)
+    cart_items = [(item.product_id, item.quantity) for item in items]
+    async with agent.page_lock:
+        result = await agent.add_many_to_cart(cart_items)
+    return {
+        "platform": platform,
+        **result
+    }
+
+@mcp.tool()
+async def place_order(platform: str, shipping_address: Dict[str, str], payment_info: Dict[str, str]) -> Dict:
+    """Place an order for the items in the cart"""
+    agent = await AgentFactory.get_agent(platform)
+    async with agent.page_lock:
+        result = await agent.place_order(shipping_address, payment_info)
+    return {
+        "platform": platform,
+        "success": result["success"],
+        "order_id": result.get("order_id"),
+        "error": result.get("error")
+    }
+
+async def serve(transport: str):
+    """Run the MCP server on the chosen transport, closing agents on exit"""
+    try:
+        if transport == "stdio":
+            await mcp.run_stdio_async()
+        else:
+            await mcp.run_streamable_http_async()
+    finally:
+        await AgentFactory.close_all()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="E-commerce MCP Server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http"], default="stdio")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    asyncio.run(serve(args.transport))
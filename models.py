@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+class CartItem(BaseModel):
+    """One product and quantity to add to a cart"""
+    product_id: str = Field(..., min_length=1)
+    quantity: int = Field(1, ge=1)
@@ -0,0 +1,199 @@
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+class ProductPrefetcher:
+    """Speculatively fetches product details for the top results of a search
+
+    Each platform gets one background worker driving its own page in the
+    agent's browser context, so prefetching never touches the interactive
+    page. Workers only start a fetch while no interactive request is
+    running; once more than max_interactive requests are in flight, the
+    running fetch is cancelled and the queues are dropped.
+    """
+
+    def __init__(self, top_n: int = 0, ttl: float = 120.0, max_entries: int = 200,
+                 max_interactive: int = 1, idle_delay: float = 0.5):
+        self.top_n = top_n
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_interactive = max_interactive
+        self.idle_delay = idle_delay
+
+        self._cache: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._pending: Dict[str, Deque[str]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self._pages: Dict[str, object] = {}
+        self._interactive = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.stats = {
+            "scheduled": 0,
+            "prefetched": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "hits": 0,
+            "misses": 0,
+            "expired_unused": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_n > 0
+
+    @contextmanager
+    def interactive(self):
+        """Mark an interactive request as running for the duration of the block"""
+        self._interactive += 1
+        self._idle.clear()
+        if self._interactive > self.max_interactive:
+            self._cancel_all()
+        try:
+            yield
+        finally:
+            self._interactive -= 1
+            if self._interactive == 0:
+                self._idle.set()
+
+    def schedule(self, platform: str, agent, product_ids: List[Optional[str]]):
+        """Queue detail fetches for the first top_n product IDs
+
+        The newest search replaces whatever an earlier search left queued,
+        since its results are the ones about to be opened.
+        """
+        if not self.enabled:
+            return
+        pending = self._pending.setdefault(platform, deque())
+        self.stats["cancelled"] += len(pending)
+        pending.clear()
+        inflight = self._inflight.get(platform)
+        for product_id in [pid for pid in product_ids if pid][:self.top_n]:
+            if (product_id in pending or self._fresh(platform, product_id) is not None
+                    or (inflight and inflight[0] == product_id)):
+                continue
+            pending.append(product_id)
+            self.stats["scheduled"] += 1
+
+        worker = self._workers.get(platform)
+        if pending and (worker is None or worker.done()):
+            self._workers[platform] = asyncio.create_task(self._run(platform, agent))
+
+    async def lookup(self, platform: str, product_id: str) -> Optional[Dict]:
+        """Return prefetched details, joining a fetch already in flight for the product"""
+        if not self.enabled:
+            return None
+        details = self._fresh(platform, product_id)
+        if details is None:
+            inflight = self._inflight.get(platform)
+            if inflight and inflight[0] == product_id:
+                try:
+                    details = await asyncio.shield(inflight[1]) or None
+                except asyncio.CancelledError:
+                    # Only a prefetch aborted under load falls through to a normal fetch;
+                    # cancellation of the calling request propagates
+                    if asyncio.current_task().cancelling():
+                        raise
+                    details = None
+                except Exception:
+                    details = None
+
+        if details is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        entry = self._cache.get((platform, product_id))
+        if entry is not None:
+            entry["used"] = True
+        return details
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "top_n": self.top_n,
+            "cached": len(self._cache),
+            "queued": sum(len(pending) for pending in self._pending.values()),
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else None,
+        }
+
+    def _fresh(self, platform: str, product_id: str) -> Optional[Dict]:
+        entry = self._cache.get((platform, product_id))
+        if entry is None:
+            return None
+        if time.monotonic() - entry["fetched_at"] > self.ttl:
+            del self._cache[(platform, product_id)]
+            if not entry["used"]:
+                self.stats["expired_unused"] += 1
+            return None
+        return entry["details"]
+
+    def _store(self, platform: str, product_id: str, details: Dict):
+        self._cache[(platform, product_id)] = {"details": details, "fetched_at": time.monotonic(), "used": False}
+        self._cache.move_to_end((platform, product_id))
+        while len(self._cache) > self.max_entries:
+            _, entry = self._cache.popitem(last=False)
+            if not entry["used"]:
+                self.stats["expired_unused"] += 1
+
+    def _cancel_all(self):
+        """Drop queued work and abort running fetches under interactive load"""
+        for pending in self._pending.values():
+            self.stats["cancelled"] += len(pending)
+            pending.clear()
+        for _, task in self._inflight.values():
+            task.cancel()
+
+    async def _run(self, platform: str, agent):
+        pending = self._pending[platform]
+        while pending:
+            # Low priority: wait for a quiet moment before each fetch
+            await self._idle.wait()
+            await asyncio.sleep(self.idle_delay)
+            if not self._idle.is_set() or not pending:
+                continue
+
+            product_id = pending.popleft()
+            try:
+                page = self._pages.get(platform)
+                if page is None or page.is_closed():
+                    page = self._pages[platform] = await agent.new_page()
+                task = asyncio.create_task(agent.get_product_details(product_id, page))
+                self._inflight[platform] = (product_id, task)
+                details = await task
+            except asyncio.CancelledError:
+                # Only a fetch aborted under load is swallowed; worker shutdown propagates
+                if asyncio.current_task().cancelling():
+                    raise
+                self.stats["cancelled"] += 1
+                continue
+            except Exception as e:
+                logging.error(f"Failed to prefetch {platform} product {product_id}: {str(e)}")
+                self.stats["failed"] += 1
+                continue
+            finally:
+                self._inflight.pop(platform, None)
+
+            if details:
+                self._store(platform, product_id, details)
+                self.stats["prefetched"] += 1
+            else:
+                self.stats["failed"] += 1
+
+    async def close(self):
+        """Stop workers and close prefetch pages"""
+        self._cancel_all()
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        for page in self._pages.values():
+            try:
+                await page.close()
+            except Exception as e:
+                logging.error(f"Error closing prefetch page: {str(e)}")
+        self._workers.clear()
+        self._pages.clear()
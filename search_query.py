@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple, Union
+from pydantic import BaseModel, Field
+import math
+
+ProductField = Literal["id", "title", "price", "rating", "image_url"]
+
+class SearchOptions(BaseModel):
+    """Server-side filtering, sorting, pagination and projection of search results"""
+    min_rating: Optional[float] = Field(None, ge=0, le=5)
+    max_rating: Optional[float] = Field(None, ge=0, le=5)
+    title_contains: Optional[str] = None
+    sort_by: Optional[Literal["price", "rating", "title"]] = None
+    descending: bool = False
+    offset: int = Field(0, ge=0)
+    limit: Optional[int] = Field(None, ge=1)
+    fields: Optional[List[ProductField]] = None
+
+@dataclass(slots=True)
+class ProductResult:
+    """Compact in-memory form of a single search result"""
+    id: str
+    title: str
+    price: Optional[float]
+    rating: Optional[float]
+    image_url: Optional[str]
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProductResult":
+        return cls(
+            id=data.get("id"),
+            title=data.get("title") or "",
+            price=_number(data.get("price")),
+            rating=_number(data.get("rating")),
+            image_url=data.get("image_url"),
+        )
+
+def _number(value) -> Optional[float]:
+    """Treat NaN from failed price/rating parsing as missing"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+def _matches(product: ProductResult, options: SearchOptions, title_needle: Optional[str]) -> bool:
+    if options.min_rating is not None and (product.rating is None or product.rating < options.min_rating):
+        return False
+    if options.max_rating is not None and (product.rating is None or product.rating > options.max_rating):
+        return False
+    if title_needle is not None and title_needle not in product.title.lower():
+        return False
+    return True
+
+def _sort(products: List[ProductResult], options: SearchOptions) -> List[ProductResult]:
+    """Sort by the requested key, keeping products without a value last"""
+    key = options.sort_by
+    present = [p for p in products if getattr(p, key) is not None]
+    missing = [p for p in products if getattr(p, key) is None]
+    if key == "title":
+        present.sort(key=lambda p: p.title.lower(), reverse=options.descending)
+    else:
+        present.sort(key=lambda p: getattr(p, key), reverse=options.descending)
+    return present + missing
+
+def _project(products: List[ProductResult], options: SearchOptions) -> List[Union[ProductResult, Dict]]:
+    """Keep only the requested fields; unprojected results are serialized as dataclasses"""
+    if not options.fields:
+        return products
+    return [{name: getattr(p, name) for name in options.fields} for p in products]
+
+def apply_search_options(results: List[Dict], options: Optional[SearchOptions] = None) -> Tuple[List[Union[ProductResult, Dict]], int]:
+    """Apply options to raw agent results, returning the page of results and the matched total"""
+    options = options or SearchOptions()
+    title_needle = options.title_contains.lower() if options.title_contains else None
+
+    products = [ProductResult.from_dict(r) for r in results]
+    products = [p for p in products if _matches(p, options, title_needle)]
+    if options.sort_by:
+        products = _sort(products, options)
+
+    total = len(products)
+    end = options.offset + options.limit if options.limit is not None else None
+    return _project(products[options.offset:end], options), total
+
+async def apply_search_options_stream(batches: AsyncIterator[List[Dict]], options: Optional[SearchOptions] = None) -> AsyncIterator[List[Union[ProductResult, Dict]]]:
+    """Apply options to streamed result batches
+
+    Filtering, pagination and projection are applied batch by batch.
+    Sorting needs every result, so a sorted stream is emitted as a single
+    batch once extraction finishes.
+    """
+    options = options or SearchOptions()
+    title_needle = options.title_contains.lower() if options.title_contains else None
+
+    if options.sort_by:
+        collected = []
+        async for batch in batches:
+            collected.extend(batch)
+        page, _ = apply_search_options(collected, options)
+        if page:
+            yield page
+        return
+
+    skip = options.offset
+    remaining = options.limit
+    async for batch in batches:
+        products = [p for p in map(ProductResult.from_dict, batch) if _matches(p, options, title_needle)]
+        if skip:
+            dropped = min(skip, len(products))
+            products = products[dropped:]
+            skip -= dropped
+        if remaining is not None:
+            products = products[:remaining]
+            remaining -= len(products)
+        if products:
+            yield _project(products, options)
+        if remaining == 0:
+            break